@@ -0,0 +1,70 @@
+"""Integer fixed-point arbitrage kernel for the cross-market consumer.
+
+Kept free of heavy imports so numba can compile it in isolation. Prices are
+int64 fixed-point units with $1.00 == SCALE; all returns are plain ints or
+flat tuples so the jitted code never boxes a dict.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels run as plain Python."""
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
+
+# Fixed-point price scale: $1.00 == 10_000 units. Kalshi cents and Polymarket
+# tick fractions (down to 0.001) both convert losslessly.
+SCALE = 10_000
+# Denominator for the ceil-div that rounds the 7% Kalshi fee up to a cent:
+# fee_cents = ceil(7 * shares * p_units * (SCALE - p_units) / SCALE^2)
+_FEE_DIV = SCALE * SCALE
+
+
+@njit(cache=True)
+def calculate_kalshi_fees(contract_price, shares):
+    """Kalshi taker fee, ceil'd to a whole cent, in fixed-point units.
+
+    contract_price is in units (see SCALE). The (x + d - 1) // d form is an
+    exact integer ceiling, replacing the old Decimal quantize(ROUND_UP).
+    """
+    fee_cents = (7 * shares * contract_price * (SCALE - contract_price)
+                 + _FEE_DIV - 1) // _FEE_DIV
+    return fee_cents * 100
+
+
+@njit(cache=True)
+def check_arb_core(m1_yes, m1_no, m2_yes, m2_no, shares):
+    """Numeric core of the cross-market check; pure int fixed-point, no dicts.
+
+    All prices are fixed-point units (see SCALE). Returns
+    (is_arbitrage, market1_action, market2_action, profit1, profit2)
+    where profitN is the pnl-if-win of betting leg N, in units.
+
+    A leg can only be profitable when its two prices sum below SCALE, so the
+    fee is computed only for legs passing that necessary condition; skipped
+    legs report their fee-less profit bound, which is still non-positive.
+    """
+    # leg 1: yes on market 1, no on market 2; fee is ceil'd to whole cents
+    profit1 = (SCALE - m1_yes) * shares - m2_no * shares
+    if profit1 > 0:
+        fee1 = ((7 * shares * m2_no * (SCALE - m2_no) + _FEE_DIV - 1) // _FEE_DIV) * 100
+        profit1 -= fee1
+    # leg 2: no on market 1, yes on market 2
+    profit2 = (SCALE - m1_no) * shares - m2_yes * shares
+    if profit2 > 0:
+        fee2 = ((7 * shares * m2_yes * (SCALE - m2_yes) + _FEE_DIV - 1) // _FEE_DIV) * 100
+        profit2 -= fee2
+
+    is_arbitrage = profit1 > 0 or profit2 > 0
+    if profit1 > profit2:
+        return is_arbitrage, 0, 1, profit1, profit2
+    return is_arbitrage, 1, 0, profit1, profit2
+
+
+# warm the JIT cache at import so the first real tick doesn't pay compile cost
+calculate_kalshi_fees(SCALE // 2, 1)
+check_arb_core(SCALE // 2, SCALE // 2, SCALE // 2, SCALE // 2, 1)
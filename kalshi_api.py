@@ -1,7 +1,10 @@
 import time
 from datetime import datetime, timedelta
 from enum import Enum
-import json
+try:
+    import orjson as _json  # ~2-3x faster than stdlib on orderbook_delta frames
+except ImportError:
+    import json as _json
 from typing import Dict, Any, Optional
 import base64
 from dotenv import load_dotenv
@@ -15,6 +18,29 @@ from cryptography.exceptions import InvalidSignature
 import websockets
 import asyncio
 
+try:
+    # Optional C-extension book state (bmoscon/order-book); ~2x faster than
+    # sortedcontainers for insert/delete at depth. DESC ordering puts the
+    # best (highest) price at index 0 for both Kalshi sides.
+    from order_book import SortedDict as _CSortedDict
+
+    def _new_side(levels):
+        side = _CSortedDict(ordering="DESC")
+        for price, quantity in levels:
+            side[price] = quantity
+        return side
+
+    def _top_level(side):
+        return side.index(0) if len(side) else None
+except ImportError:
+    from sortedcontainers import SortedDict as _PySortedDict
+
+    def _new_side(levels):
+        return _PySortedDict(levels)
+
+    def _top_level(side):
+        return side.peekitem(-1) if side else None
+
 class Environment(Enum):
     DEMO = "demo"
     PROD = "prod"
@@ -39,11 +65,22 @@ class KalshiBaseClient:
         self.private_key = private_key
         self.environment = environment
         self.last_api_call = datetime.now()
+        # Signing state is reused across requests: the PSS padding and hash
+        # objects allocate backend state on construction, and method+path is a
+        # tiny repeating suffix of every signed message.
+        self._pss_padding = padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.DIGEST_LENGTH
+        )
+        self._hash_alg = hashes.SHA256()
+        self._method_path_cache: Dict[tuple, bytes] = {}
         self.orderbook = {}
+        self._best_by_ticker = {}
+        self._tob_key = {}  # ticker -> (yes_top, no_top) of last published entry
         self.best_offers = {
             "market": "Kalshi",
             "best_offers": None,
-            "timestamp": int(round(time.time() * 1000))
+            "timestamp": time.time_ns() // 1_000_000
         }
 
         if self.environment == Environment.DEMO:
@@ -57,36 +94,39 @@ class KalshiBaseClient:
 
     def request_headers(self, method: str, path: str) -> Dict[str, Any]:
         """Generates the required authentication headers for API requests."""
-        current_time_milliseconds = int(time.time() * 1000)
-        timestamp_str = str(current_time_milliseconds)
+        current_time_milliseconds = time.time_ns() // 1_000_000
+        timestamp_bytes = b"%d" % current_time_milliseconds
 
-        # Remove query params from path
-        path_parts = path.split('?')
+        # Remove query params from path; cache the encoded method+path suffix
+        key = (method, path.split('?')[0])
+        method_path_bytes = self._method_path_cache.get(key)
+        if method_path_bytes is None:
+            method_path_bytes = (key[0] + key[1]).encode('utf-8')
+            self._method_path_cache[key] = method_path_bytes
 
-        msg_string = timestamp_str + method + path_parts[0]
-        signature = self.sign_pss_text(msg_string)
+        signature = self.sign_pss_bytes(timestamp_bytes + method_path_bytes)
 
         headers = {
             "Content-Type": "application/json",
             "KALSHI-ACCESS-KEY": self.key_id,
             "KALSHI-ACCESS-SIGNATURE": signature,
-            "KALSHI-ACCESS-TIMESTAMP": timestamp_str,
+            "KALSHI-ACCESS-TIMESTAMP": timestamp_bytes.decode('ascii'),
         }
         return headers
-    
+
 
 
     def sign_pss_text(self, text: str) -> str:
         """Signs the text using RSA-PSS and returns the base64 encoded signature."""
-        message = text.encode('utf-8')
+        return self.sign_pss_bytes(text.encode('utf-8'))
+
+    def sign_pss_bytes(self, message: bytes) -> str:
+        """Signs raw bytes using RSA-PSS and returns the base64 encoded signature."""
         try:
             signature = self.private_key.sign(
                 message,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.DIGEST_LENGTH
-                ),
-                hashes.SHA256()
+                self._pss_padding,
+                self._hash_alg
             )
             return base64.b64encode(signature).decode('utf-8')
         except InvalidSignature as e:
@@ -107,6 +147,7 @@ class KalshiWebSocketClient(KalshiBaseClient):
         self.message_id = 1  # Add counter for message IDs
         self._callback = callback
         self.tickers = None
+        self._touched = set()  # tickers with unpublished book changes
 
     async def connect(self, tickers: Optional[list] = None):
         """Establishes a WebSocket connection using authentication."""
@@ -134,7 +175,8 @@ class KalshiWebSocketClient(KalshiBaseClient):
                 "market_tickers": self.tickers
             }
         }
-        await self.ws.send(json.dumps(subscription_message))
+        # orjson.dumps returns bytes, stdlib returns str; websockets accepts both
+        await self.ws.send(_json.dumps(subscription_message))
         self.message_id += 1
 
 
@@ -143,11 +185,24 @@ class KalshiWebSocketClient(KalshiBaseClient):
         try:
             async for message in self.ws:
                 await self.on_message(message)
+                # Coalesce bursts: hold off publishing while more frames are
+                # already sitting in the websocket's receive buffer
+                if not self._frames_buffered():
+                    self.publish_best_offers()
         except websockets.ConnectionClosed as e:
             await self.on_close(e.code, e.reason)
         except Exception as e:
             await self.on_error(e)
 
+    def _frames_buffered(self) -> bool:
+        """True if frames are already queued ahead of the next recv.
+
+        The asyncio implementation buffers incoming frames on the
+        connection's recv_messages assembler.
+        """
+        assembler = getattr(self.ws, "recv_messages", None)
+        return assembler is not None and bool(assembler.frames)
+
 
     async def on_error(self, error):
         """Callback for handling errors."""
@@ -160,81 +215,103 @@ class KalshiWebSocketClient(KalshiBaseClient):
 
 
     async def on_message(self, message):
-        """Callback for handling incoming messages."""
-        json_message = json.loads(message)
-        if json_message["type"] == "orderbook_snapshot":
-            self.update_orderbook_from_snapshot(json_message["msg"])
-        elif json_message["type"] == "orderbook_delta":
-            self.update_orderbook_from_delta(json_message["msg"])
-        # elif json_message["type"] == "ticker_v2":
-        #     print("Ticker update received")
-        best_offers = self.get_best_offers()
-        # for market_ticker, data in best_offers.items():
-        #     print(f"Kalshi {market_ticker[-3::]}: best bid: {data['best_bid']} best ask: {data['best_ask']} spread: {data['spread']} ")
-        result =  {
+        """Apply an incoming message to the book; publishing happens per drain."""
+        json_message = _json.loads(message)
+        message_type = json_message["type"]
+        if message_type == "orderbook_snapshot":
+            market_ticker = self.update_orderbook_from_snapshot(json_message["msg"])
+        elif message_type == "orderbook_delta":
+            market_ticker = self.update_orderbook_from_delta(json_message["msg"])
+        else:
+            # e.g. ticker_v2; nothing book-related to do
+            return
+        if market_ticker is not None:
+            self._touched.add(market_ticker)
+
+    def publish_best_offers(self):
+        """Refresh touched tickers and fire the callback once if anything moved."""
+        if not self._touched:
+            return
+        changed = False
+        for market_ticker in self._touched:
+            if self._refresh_best_offer(market_ticker):
+                changed = True
+        self._touched.clear()
+        if not changed:
+            return
+
+        self.best_offers = {
             "market": "Kalshi",
-            "best_offers": best_offers,
-            "timestamp": int(round(time.time() * 1000))
+            "best_offers": dict(self._best_by_ticker),
+            "timestamp": time.time_ns() // 1_000_000
         }
-
-        if self._callback and best_offers != self.best_offers['best_offers']:
-            self.best_offers = result
+        if self._callback:
             self._callback(self.best_offers)
-        
+
     def update_orderbook_from_delta(self, message):
-        """Update the orderbook with the latest data."""
+        """Update the orderbook with the latest data.
+
+        Returns the ticker when the published top-of-book may have moved,
+        None when the delta landed strictly below it.
+        """
         market_ticker = message["market_ticker"]
         side = message["side"]
         price = message["price"]
         delta = message["delta"]
-        idx = self.find_index(price, market_ticker, side)
-        if idx == len(self.orderbook[market_ticker][side]):
-            self.orderbook[market_ticker][side].append((price, delta))
-            return
-        
-        orderbook_level = self.orderbook[market_ticker][side][idx]
-        if orderbook_level[0] == price:
-            new_quantity = orderbook_level[1] + delta
-            if new_quantity <= 0:
-                self.orderbook[market_ticker][side].pop(idx)
-            else:
-                self.orderbook[market_ticker][side][idx] = (price, new_quantity)
-        else:
-            if delta > 0:
-                self.orderbook[market_ticker][side].insert(idx, (price, delta))
-                        
-
-    def find_index(self, price: int, ticker: str, side: str) -> int:
-        arr = self.orderbook[ticker][side]
-        l,r = 0, len(arr)-1
-        while l <= r:
-            mid = (l+r)// 2
-            if arr[mid][0] == price:
-                return mid
-            elif arr[mid][0] < price:
-                l = mid + 1
-            else:
-                r = mid - 1
-        return l
+        book = self.orderbook[market_ticker][side]
+        new_quantity = (book[price] if price in book else 0) + delta
+        if new_quantity > 0:
+            book[price] = new_quantity
+        elif price in book:
+            del book[price]
+
+        cached = self._tob_key.get(market_ticker)
+        if cached is not None:
+            side_top = cached[0] if side == "yes" else cached[1]
+            if side_top is not None and price < side_top[0]:
+                return None
+        return market_ticker
+
     def update_orderbook_from_snapshot(self, message):
-        """Update the orderbook with the latest snapshot."""
-        market_ticker = message["market_ticker"]
-        self.orderbook[market_ticker] = message
+        """Update the orderbook with the latest snapshot. Returns the ticker touched.
 
+        Each side is bulk-built in a single pass over the snapshot's
+        [price, quantity] arrays rather than level-by-level inserts.
+        """
+        market_ticker = message["market_ticker"]
+        # Price levels keyed by price in cents; O(log n) insert/delete with no memmove
+        self.orderbook[market_ticker] = {
+            "yes": _new_side(message.get("yes") or ()),
+            "no": _new_side(message.get("no") or ()),
+        }
+        return market_ticker
+
+    def _refresh_best_offer(self, market_ticker) -> bool:
+        """Recompute the cached best offer for one ticker; True if it changed."""
+        data = self.orderbook[market_ticker]
+        yes_top = _top_level(data["yes"])
+        no_top = _top_level(data["no"])
+
+        # Flat top-of-book key comparison; skip building the entry dict when
+        # the delta didn't move either top level
+        key = (yes_top, no_top)
+        if key == self._tob_key.get(market_ticker):
+            return False
+        self._tob_key[market_ticker] = key
+
+        best_bid = yes_top[0] if yes_top else None
+        best_ask = 100 - no_top[0] if no_top else None
+        spread = best_ask - best_bid if best_bid and best_ask else None
+        self._best_by_ticker[market_ticker] = {
+            "best_bid": (best_bid, yes_top[1]) if best_bid else None,
+            "best_ask": (best_ask, no_top[1]) if best_ask else None,
+            "spread": spread,
+        }
+        return True
 
     def get_best_offers(self) -> Dict[str, Dict[str, Any]]:
         """Get the best offers from the orderbook."""
-        best_offers = {}
-        for market_ticker, data in self.orderbook.items():
-            best_bid = data["yes"][-1][0] if data["yes"] else None
-            best_ask = 100-data["no"][-1][0] if data["no"] else None
-            spread = best_ask - best_bid if best_bid and best_ask else None
-            best_offers[market_ticker] = {
-                "best_bid": (best_bid, data["yes"][-1][1]) if best_bid else None,
-                "best_ask": (best_ask, data["no"][-1][1]) if best_ask else None,
-                "spread": spread,
-            }
-        return best_offers
+        return dict(self._best_by_ticker)
     
 
     async def place_order(self, ticker: str, price: int, size: int, side: str ="yes", post_only: bool = False, time_in_force: str = "fill_or_kill", expiration_ts: Optional[int] = None): 
@@ -247,7 +324,7 @@ class KalshiWebSocketClient(KalshiBaseClient):
             "side": side,  # "yes" or "no" for the given ticker
             "yes_price": price, # Price in cents (1-99). If side is "no", this is 100-no_price. 
             # "time_in_force": time_in_force, Not currently supported
-            "client_order_id": f"kalshi_arb_{int(time.time()*1000)}_{ticker}", # UNIQUE ID 
+            "client_order_id": f"kalshi_arb_{time.time_ns() // 1_000_000}_{ticker}", # UNIQUE ID
             "post_only": post_only, 
             "expiration_ts": expiration_ts,  # Optional, in milliseconds since epoch
         }
@@ -275,6 +352,38 @@ class KalshiWebSocketClient(KalshiBaseClient):
 
         
 
+def check_websockets_speedups() -> bool:
+    """Warn if the websockets C accelerator is missing.
+
+    The C apply_mask is ~30x faster than the pure-Python fallback, which
+    matters on high-rate orderbook_delta streams; it is absent when
+    websockets was installed from source instead of a wheel.
+    """
+    try:
+        from websockets.speedups import apply_mask  # noqa: F401
+        return True
+    except ImportError:
+        print("[kalshi] Warning: websockets C speedups unavailable; frame "
+              "masking will run in pure Python. Reinstall websockets from a "
+              "binary wheel.")
+        return False
+
+
+def check_crypto_backend() -> str:
+    """Report the OpenSSL build backing the signing path.
+
+    RSA-PSS/SHA-256 throughput depends on the linked OpenSSL having the
+    SHA-NI and ADX/BMI2 assembly paths enabled; OpenSSL >= 3.0 wheels of
+    cryptography >= 42 ship them by default. Warn on older builds.
+    """
+    from cryptography.hazmat.backends.openssl import backend
+    version = backend.openssl_version_text()
+    if "OpenSSL 1." in version:
+        print(f"[kalshi] Warning: signing via old OpenSSL build ({version}); "
+              "upgrade cryptography for hardware-accelerated SHA-256/RSA.")
+    return version
+
+
 def load_private_key_from_file(file_path: str) -> rsa.RSAPrivateKey:
     with open(file_path, "rb") as key_file:
         private_key = serialization.load_pem_private_key(
@@ -287,7 +396,14 @@ def load_private_key_from_file(file_path: str) -> rsa.RSAPrivateKey:
 
 if __name__ == "__main__":
     # Example usage
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # optional; default asyncio loop works, just slower
     load_dotenv()
+    check_crypto_backend()
+    check_websockets_speedups()
     env = Environment.PROD
     KEYID = os.getenv("KALSHI_TEST_API_ID")
     private_key = load_private_key_from_file("kalshi_test.pem")
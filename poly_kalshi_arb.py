@@ -1,19 +1,78 @@
 from polymarket_api import AsyncMarketDataClient
-from kalshi_api import KalshiWebSocketClient, Environment
+from kalshi_api import KalshiWebSocketClient, Environment, check_websockets_speedups
 from py_clob_client.clob_types import ApiCreds
 from py_clob_client.order_builder.constants import BUY
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import rsa
 import asyncio
+import collections
+import functools
+import logging
+import logging.handlers
 import math
 import os
-from decimal import Decimal, getcontext
+import queue as thread_queue
 from dotenv import load_dotenv
 import tkinter as tk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
-getcontext().prec = 8
+
+from arb_kernel import SCALE, calculate_kalshi_fees, check_arb_core as _check_arb_core
+
+# Hot-path logging: the consumer only appends a record to a SimpleQueue; the
+# actual formatting and stdout write happen on the QueueListener's thread, so
+# a slow terminal can never stall the event loop mid-tick.
+log = logging.getLogger(__name__)
+
+
+def start_log_listener():
+    """Wire this module's logger through a background QueueListener."""
+    log_q = thread_queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(log_q))
+    log.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(log_q, logging.StreamHandler())
+    listener.start()
+    return listener
+
+class SingleConsumerQueue:
+    """Minimal deque+Future queue for the single message_consumer reader.
+
+    asyncio.Queue carries locks and getter/putter bookkeeping that buy
+    nothing with exactly one consumer; a plain deque plus a wakeup Future
+    is cheaper per put/get. API mirrors the asyncio.Queue subset used here.
+
+    The buffer is bounded with drop-oldest semantics: only the newest
+    top-of-book matters for arbitrage decisions, so under a burst the
+    backlog stays flat instead of growing without bound.
+    """
+    def __init__(self, maxsize=256):
+        self._buf = collections.deque(maxlen=maxsize)
+        self._event = asyncio.Event()
+
+    def put_nowait(self, item):
+        self._buf.append(item)
+        self._event.set()
+
+    async def get(self):
+        while not self._buf:
+            self._event.clear()
+            await self._event.wait()
+        return self._buf.popleft()
+
+    async def get_batch(self):
+        """Wait for data, then drain and return everything buffered.
+
+        One event-loop round-trip is amortized over the whole burst; the
+        reusable Event avoids a Future allocation per message.
+        """
+        while not self._buf:
+            self._event.clear()
+            await self._event.wait()
+        batch = list(self._buf)
+        self._buf.clear()
+        return batch
+
 
 class RealTimeGraph:
     def __init__(self, master, market_labels):
@@ -35,18 +94,55 @@ class RealTimeGraph:
 
         self.bars = self.ax.bar(range(len(self.market_labels)), [0]*len(self.market_labels), width=0.8, color='skyblue')
         self.bar_labels = self.ax.bar_label(self.bars)
-        self.canvas.draw_idle()
+        # Redraw only every Nth tick; the flush task in main() guarantees the
+        # latest heights still hit the screen within ~100 ms
+        self._draw_counter = 0
+        self._draw_skip = 20
+        # Lets the tk loop skip full update() passes while nothing changed
+        self.needs_redraw = False
+        # Blitting: render the static figure (axes, ticks, titles) once and
+        # cache it; per update we restore that background and repaint only
+        # the bars and their labels instead of compositing the whole figure
+        self.canvas.draw()
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.canvas.mpl_connect("resize_event", self._on_resize)
+
+    def _on_resize(self, event):
+        # The cached background is stale at the new size; re-render and recapture
+        self.canvas.draw()
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+
+    def _blit(self):
+        self.canvas.restore_region(self._bg)
+        for bar_obj in self.bars:
+            self.ax.draw_artist(bar_obj)
+        for label in self.bar_labels:
+            self.ax.draw_artist(label)
+        self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+        self.needs_redraw = True
 
     def update_graph(self, p1, p2, k1, k2):
-        data_values = [float(p1), float(p2), float(k1), float(k2)]
-        
-        for bar_obj, height in zip(self.bars, data_values):
+        """Prices arrive as fixed-point int units; scale to dollars here."""
+        inv = _INV_SCALE
+        data_values = (p1 * inv, p2 * inv, k1 * inv, k2 * inv)
+
+        # Mutate the existing annotation artists rather than
+        # remove()+bar_label(), which would allocate fresh artists and churn
+        # the artist list per tick
+        for bar_obj, label, height in zip(self.bars, self.bar_labels, data_values):
             bar_obj.set_height(height)
-        
-        for label in self.bar_labels:
-            label.remove()
-        self.bar_labels = self.ax.bar_label(self.bars)
-        self.canvas.draw_idle()
+            label.set_text(f"{height:.3f}")
+            # bar_label returns Annotations; xy is the data-coordinate anchor
+            # (set_position would move the points-offset instead)
+            label.xy = (bar_obj.get_x() + bar_obj.get_width() / 2, height)
+        self._draw_counter += 1
+        if self._draw_counter % self._draw_skip == 0:
+            self._blit()
+
+    def flush(self):
+        """Push whatever state the bars hold to the canvas."""
+        self._blit()
 
 
 def load_private_key_from_file(file_path: str) -> rsa.RSAPrivateKey:
@@ -58,11 +154,28 @@ def load_private_key_from_file(file_path: str) -> rsa.RSAPrivateKey:
         )
     return private_key
 
-async def run_tk_event_loop(root, interval=0.01):
+async def flush_graph_periodically(graph, interval=0.1):
+    """Force a redraw at a fixed cadence so throttled ticks still show up."""
+    while True:
+        graph.flush()
+        await asyncio.sleep(interval)
+
+
+async def run_tk_event_loop(root, graph=None, interval=0.033):
+    # ~30 FPS is indistinguishable from the old 100 Hz polling for a bar
+    # chart but costs a third of the tk/mpl overhead. Full update() passes
+    # are gated on the graph having drawn something; a periodic pass still
+    # runs so the window stays responsive while the market is quiet.
+    idle_ticks = 0
     try:
         while root.winfo_exists():
             root.update_idletasks()
-            root.update()
+            idle_ticks += 1
+            if graph is None or graph.needs_redraw or idle_ticks >= 10:
+                if graph is not None:
+                    graph.needs_redraw = False
+                idle_ticks = 0
+                root.update()
             await asyncio.sleep(interval)
         print("Tkinter window was closed.")
     except tk.TclError as e:
@@ -75,147 +188,202 @@ async def run_tk_event_loop(root, interval=0.01):
         if root.winfo_exists():
             root.destroy()
         raise
-async def message_consumer(
-    queue: asyncio.Queue, 
-    polymarket_client: AsyncMarketDataClient, 
-    kalshi_client: KalshiWebSocketClient,
-    real_time_graph: RealTimeGraph     
-):
-    """Centralized consumer of all WS messages."""
-    polymarket_offers = {}
-    kalshi_offers = {}
-    prev_price_levels = []
-    prev_levels = []
-    total_profit = Decimal('0') # Use Decimal for profit/cost
-    total_cost = Decimal('0')
-
-    # These are Polymarket outcomes and Kalshi tickers
-    
+# Kalshi prices arrive as integer cents; multiply by this instead of dividing
+INV100 = 1.0 / 100.0
+# Fixed-point units back to dollars for display
+_INV_SCALE = 1.0 / SCALE
 
-    markets = ['Dodgers', 'Diamondbacks', "KXMLBGAME-25MAY21AZLAD-LAD", "KXMLBGAME-25MAY21AZLAD-AZ"]
-    
-    # Mapping Polymarket outcomes to their corresponding "yes" token_id.
-    # This will be populated when the first Polymarket message with token_ids arrives.
-    # Or, ideally, the AsyncMarketDataClient could provide a method to get token_id by outcome.
-    # For now, we rely on token_id being in polymarket_offers after client modification.
-    arbitrage_regime = False
-    arbitrage_start = None
-    arbitrage_times = []
-    #plot 
 
-    while True:
-        source_name, payload = await queue.get()
-        
-        if source_name == "polymarket":
-            polymarket_offers = payload['best_offers']
-        elif source_name == "kalshi":
-            kalshi_offers = payload['best_offers']
-
-        # Check for arbitrage opportunities
-        # Ensure all necessary keys (outcomes/tickers) are present in the offers
-        required_pm_keys = markets[:2]
-        required_kalshi_keys = markets[2:]
-
-        if not all(m in polymarket_offers for m in required_pm_keys) or \
-           not all(m in kalshi_offers for m in required_kalshi_keys):
-            # print("[INFO] Missing market data for arbitrage check. Waiting for more data.")
-            await asyncio.sleep(0.1) # Avoid busy-looping if data is temporarily missing
-            queue.task_done()
-            continue
-        
+def _enqueue(loop, queue, source, payload):
+    """WS-client callback target; safe even if a client fires it off-loop."""
+    loop.call_soon_threadsafe(queue.put_nowait, (source, payload))
+
+
+class ArbEngine:
+    """Single-threaded deterministic state machine for the arb consumer.
+
+    All mutable trading state lives on slotted attributes and is only ever
+    touched from the consumer task, so every decision is a pure function of
+    the message sequence. Payload routing goes through a dispatch dict of
+    bound methods built once in message_consumer.
+    """
+
+    __slots__ = (
+        "polymarket_client", "kalshi_client", "real_time_graph", "markets", "log_labels", "loop",
+        "polymarket_offers", "kalshi_offers", "pm", "kx",
+        "prev_levels", "prev_price_levels", "last_price_key",
+        "total_profit", "total_cost",
+        "arbitrage_regime", "arbitrage_start", "arbitrage_times",
+    )
+
+    def __init__(self, polymarket_client, kalshi_client, real_time_graph):
+        self.polymarket_client = polymarket_client
+        self.kalshi_client = kalshi_client
+        self.real_time_graph = real_time_graph
+        # Engine is built inside the consumer task, so the running loop is
+        # available; loop.time() skips get_event_loop's thread-local lookup
+        self.loop = asyncio.get_running_loop()
+        # Polymarket outcomes followed by Kalshi tickers. token_id for orders
+        # rides along inside polymarket_offers entries.
+        self.markets = ['Dodgers', 'Diamondbacks', "KXMLBGAME-25MAY21AZLAD-LAD", "KXMLBGAME-25MAY21AZLAD-AZ"]
+        # Short Kalshi suffixes for the level-change log line, sliced once
+        self.log_labels = (self.markets[0], self.markets[1],
+                           self.markets[2][-3:], self.markets[3][-3:])
+        self.polymarket_offers = {}
+        self.kalshi_offers = {}
+        # Hot-path offer state in fixed slots (0=markets[0], 1=markets[1],
+        # ...), flattened to fixed-shape tuples at the payload boundary:
+        # pm[i] = (best_ask_tuple, token_id), kx[i] = best_ask_tuple. tick()
+        # never probes the nested offers dicts at all
+        self.pm = [None, None]
+        self.kx = [None, None]
+        self.prev_levels = []
+        self.prev_price_levels = []
+        self.last_price_key = None  # raw best-ask prices of the previous tick
+        self.total_profit = 0.0
+        self.total_cost = 0.0
+        self.arbitrage_regime = False
+        self.arbitrage_start = None
+        self.arbitrage_times = []
+
+    def on_polymarket(self, payload):
+        offers = payload['best_offers']
+        self.polymarket_offers = offers
+        pm = self.pm
+        e0 = offers.get(self.markets[0])
+        e1 = offers.get(self.markets[1])
+        pm[0] = (e0["best_ask"], e0.get("token_id")) if e0 else None
+        pm[1] = (e1["best_ask"], e1.get("token_id")) if e1 else None
+
+    def on_kalshi(self, payload):
+        offers = payload['best_offers']
+        self.kalshi_offers = offers
+        kx = self.kx
+        e0 = offers.get(self.markets[2])
+        e1 = offers.get(self.markets[3])
+        kx[0] = e0["best_ask"] if e0 else None
+        kx[1] = e1["best_ask"] if e1 else None
+
+    async def tick(self):
+        """Run one arbitrage check against the newest offers."""
+        markets = self.markets
+
+        # Offer state comes from the fixed slots filled at the payload
+        # boundary — four array loads, no dict probing on the hot path
+        pm1, pm2 = self.pm
+        kx1, kx2 = self.kx
+
+        # Nothing to stall on while a side is still warming up: get_batch()
+        # already blocks until the next payload, so just skip this tick
+        if pm1 is None or pm2 is None or kx1 is None or kx2 is None:
+            return
+
         # Ensure best_ask is available
         try:
-            p1_data = polymarket_offers[markets[0]]["best_ask"]
-            p2_data = polymarket_offers[markets[1]]["best_ask"]
-            k1_data = kalshi_offers[markets[2]]["best_ask"]
-            k2_data = kalshi_offers[markets[3]]["best_ask"]
-            
+            p1_data = pm1[0]
+            p2_data = pm2[0]
+            k1_data = kx1
+            k2_data = kx2
+
             if not all([p1_data, p2_data, k1_data, k2_data]):
-                # print("[INFO] Missing best_ask data in one of the offers.")
-                await asyncio.sleep(0.1)
-                queue.task_done()
-                continue
-
-            p1 = Decimal(p1_data[0])
-            p2 = Decimal(p2_data[0])
-            k1 = Decimal(k1_data[0]) / Decimal("100") # Kalshi prices are 1-99, convert to 0.01-0.99 for check_arbitrage
-            k2 = Decimal(k2_data[0]) / Decimal("100")
-            real_time_graph.update_graph(p1, p2, k1, k2) # Update the graph with new data
+                return
+
+            # Size-only updates can't change the arb outcome; skip the tick
+            # entirely when all four ask prices match the previous one
+            price_key = (p1_data[0], p2_data[0], k1_data[0], k2_data[0])
+            if price_key == self.last_price_key:
+                return
+            self.last_price_key = price_key
+
+            p1 = p1_data[0] # Polymarket prices already arrive as fixed-point units
+            p2 = p2_data[0]
+            k1 = k1_data[0] * 100 # Kalshi prices are integer cents; cents * 100 == units
+            k2 = k2_data[0] * 100
+            self.real_time_graph.update_graph(p1, p2, k1, k2) # takes int units
         except (KeyError, TypeError, IndexError) as e:
-            print(f"[ERROR] Could not extract price data: {e}. Offers: PM={polymarket_offers}, Kalshi={kalshi_offers}")
-            queue.task_done()
-            continue
-        
-        
-        result = check_markets_arbitrage(p1, p2, k1, k2, shares=Decimal("1.0")) # Use Decimal for shares
-        
-        cur_levels = [p1_data, p2_data, k1_data, k2_data]
-        if not prev_levels or cur_levels != prev_levels:
-            print(f"{markets[0]}: {p1_data}, {markets[1]}: {p2_data}, {markets[2][-3:]}: {k1_data}, {markets[3][-3:]}: {k2_data}, Arb PNLs: M1={result['market1_pnl']:.4f}, M2={result['market2_pnl']:.4f}")
-        prev_levels = cur_levels
-
-        if result["is_arbitrage"]:
-            if not arbitrage_regime:
-                print(f"[INFO] Arbitrage regime started at {result['strategy']}")
-                arbitrage_regime = True
-                arbitrage_start = asyncio.get_event_loop().time()
-            m1_action_idx = result["market1_action"] # 0 for markets[0] (e.g. Phillies), 1 for markets[1] (e.g. Rockies)
-            m2_action_idx = result["market2_action"] # 0 for Kalshi's version of markets[0], 1 for Kalshi's version of markets[1]
-            profit_per_share = result["profit_per_share"]
+            log.error("Could not extract price data: %s. Offers: PM=%s, Kalshi=%s",
+                      e, self.polymarket_offers, self.kalshi_offers)
+            return
+
+        # Fused decide+report: the kernel hands back the buy levels it chose,
+        # so nothing below re-queries the offer dicts for prices
+        (is_arb, m1_action_idx, m2_action_idx, profit_per_share,
+         pm_buy_units, kx_buy_units, profit1, profit2) = check_markets_arbitrage(
+            p1, p2, k1, k2, shares=1)
+
+        cur_levels = (p1_data, p2_data, k1_data, k2_data)
+        if not self.prev_levels or cur_levels != self.prev_levels:
+            lbl = self.log_labels
+            log.info("%s: %s, %s: %s, %s: %s, %s: %s, Arb PNLs: M1=%.4f, M2=%.4f",
+                     lbl[0], p1_data, lbl[1], p2_data,
+                     lbl[2], k1_data, lbl[3], k2_data,
+                     profit1 / SCALE, profit2 / SCALE)
+        self.prev_levels = cur_levels
+
+        if is_arb:
+            strategy = describe_strategy(m1_action_idx, pm_buy_units,
+                                         kx_buy_units, profit_per_share)
+            if not self.arbitrage_regime:
+                log.info("Arbitrage regime started at %s", strategy)
+                self.arbitrage_regime = True
+                self.arbitrage_start = self.loop.time()
 
             # Current prices for comparison with previous
             current_price_levels = [p1_data[0], p2_data[0], k1_data[0], k2_data[0]]
-            if prev_price_levels and current_price_levels == prev_price_levels:
-                print(f"No price change, skipping arbitrage opportunity. Total profit: {total_profit:.4f}, Total cost: {total_cost:.4f}")
-                queue.task_done()
-                continue
-            
+            if self.prev_price_levels and current_price_levels == self.prev_price_levels:
+                log.info("No price change, skipping arbitrage opportunity. Total profit: %.4f, Total cost: %.4f",
+                         self.total_profit, self.total_cost)
+                return
+
             # Polymarket details
             pm_outcome_name = markets[m1_action_idx]
-            pm_order_details = polymarket_offers[pm_outcome_name]
-            pm_token_id = pm_order_details.get("token_id") 
-            
+            pm_ask, pm_token_id = (pm1, pm2)[m1_action_idx]
+
             if not pm_token_id:
-                print(f"[ERROR] Missing token_id for Polymarket outcome {pm_outcome_name}. Offers: {pm_order_details}")
-                queue.task_done()
-                continue
+                log.error("Missing token_id for Polymarket outcome %s. Ask: %s",
+                          pm_outcome_name, pm_ask)
+                return
 
-            pm_price_to_buy = Decimal(pm_order_details["best_ask"][0])
-            pm_available_size = Decimal(pm_order_details["best_ask"][1])
+            pm_price_to_buy = pm_buy_units / SCALE # back to dollars for the API
+            pm_available_size = pm_ask[1]
 
             # Kalshi details
             # If m2_action_idx = 0, we use markets[2] (e.g. KXMLBGAME-25MAY19PHICOL-PHI)
             # If m2_action_idx = 1, we use markets[3] (e.g. KXMLBGAME-25MAY19PHICOL-COL)
-            kalshi_ticker_to_buy = markets[m2_action_idx + 2] 
-            kalshi_order_details = kalshi_offers[kalshi_ticker_to_buy]
-            kalshi_price_to_buy_cents = Decimal(kalshi_order_details["best_ask"][0]) # This is already in cents (1-99)
-            kalshi_available_size = Decimal(kalshi_order_details["best_ask"][1])
+            kalshi_ticker_to_buy = markets[m2_action_idx + 2]
+            kalshi_ask = (kx1, kx2)[m2_action_idx]
+            kalshi_price_to_buy_cents = kx_buy_units // 100 # units back to int cents (1-99)
+            kalshi_available_size = kalshi_ask[1]
 
-            print(f"Arbitrage found: {result['strategy']}. PM Ask: {pm_order_details['best_ask']}, Kalshi Ask: {kalshi_order_details['best_ask']}")
+            log.info("Arbitrage found: %s. PM Ask: %s, Kalshi Ask: %s",
+                     strategy, pm_ask, kalshi_ask)
 
             max_size_without_slippage = min(pm_available_size, kalshi_available_size)
-            
-            if max_size_without_slippage <= Decimal("0"): # Or some minimum trade size
-                print(f"Calculated max size is {max_size_without_slippage}, too small to trade.")
-                queue.task_done()
-                continue
+
+            if max_size_without_slippage <= 0: # Or some minimum trade size
+                log.info("Calculated max size is %s, too small to trade.", max_size_without_slippage)
+                return
 
             # For now, let's cap the trade size for testing, e.g., 1 contract/share
-            # trade_size = min(max_size_without_slippage, Decimal("1.0")) 
+            # trade_size = min(max_size_without_slippage, 1.0)
             trade_size = max_size_without_slippage # Uncomment for full size
 
             cost_pm = pm_price_to_buy * trade_size
-            cost_kalshi = (kalshi_price_to_buy_cents / Decimal("100")) * trade_size
+            cost_kalshi = (kalshi_price_to_buy_cents * INV100) * trade_size
             total_potential_cost_for_arb = cost_pm + cost_kalshi
-            potential_profit_for_arb = profit_per_share * trade_size
-            
-            print(f"Max size: {max_size_without_slippage}, Trading size: {trade_size}, Potential Profit: {potential_profit_for_arb:.4f}, Potential Cost: {total_potential_cost_for_arb:.4f}")
+            # profit stays in int units until this display/accounting boundary
+            potential_profit_for_arb = (profit_per_share * trade_size) / SCALE
+
+            log.info("Max size: %s, Trading size: %s, Potential Profit: %.4f, Potential Cost: %.4f",
+                     max_size_without_slippage, trade_size,
+                     potential_profit_for_arb, total_potential_cost_for_arb)
 
             # --- Attempt to place orders ---
             try:
-                print(f"Attempting to place Polymarket order: BUY {float(trade_size)} of {pm_outcome_name} (TokenID: {pm_token_id}) @ {float(pm_price_to_buy)}")
+                log.info("Attempting to place Polymarket order: BUY %s of %s (TokenID: %s) @ %s",
+                         float(trade_size), pm_outcome_name, pm_token_id, float(pm_price_to_buy))
                 '''
-                await polymarket_client.place_order(
+                await self.polymarket_client.place_order(
                     token_id=pm_token_id,
                     price=float(pm_price_to_buy), # py_clob_client expects float
                     size=float(trade_size),       # py_clob_client expects float
@@ -226,7 +394,7 @@ async def message_consumer(
 
                 print(f"Attempting to place Kalshi order: BUY {int(trade_size)} of {kalshi_ticker_to_buy} @ {int(kalshi_price_to_buy_cents)}c, side 'yes'")
                 #fill or kill currently not supported in Kalshi api 2.0.4, will be added in 2.0.5
-                await kalshi_client.place_order(
+                await self.kalshi_client.place_order(
                     ticker=kalshi_ticker_to_buy,
                     price=int(kalshi_price_to_buy_cents), # Kalshi expects price in cents (integer)
                     size=int(trade_size),                 # Kalshi expects integer size
@@ -234,38 +402,62 @@ async def message_consumer(
                     post_only=True,                       # Taker for this arbitrage
                     time_in_force="fill_or_kill"          # FOK for immediate execution
                 )
-                await kalshi_client.place_order(
+                await self.kalshi_client.place_order(
                     ticker=kalshi_ticker_to_buy,
                     price=int(kalshi_price_to_buy_cents), # Kalshi expects price in cents (integer)
                     size=int(trade_size),                 # Kalshi expects integer size
                     side="yes",                           # Always buy "yes"
-                    expiration_ts=0                       # Expiration set in the past, IOC order   
+                    expiration_ts=0                       # Expiration set in the past, IOC order
                 )
                 print("Kalshi order attempt successful.")
                 '''
                 # If both orders are successfully submitted (not necessarily filled yet, but FOK helps)
-                total_cost += total_potential_cost_for_arb
-                total_profit += potential_profit_for_arb
-                prev_price_levels = current_price_levels # Update price levels to avoid re-trading same opportunity immediately
-                print(f"Arbitrage orders submitted. Current Total Profit: {total_profit:.4f}, Current Total Cost: {total_cost:.4f}")
+                self.total_cost += total_potential_cost_for_arb
+                self.total_profit += potential_profit_for_arb
+                self.prev_price_levels = current_price_levels # Update price levels to avoid re-trading same opportunity immediately
+                log.info("Arbitrage orders submitted. Current Total Profit: %.4f, Current Total Cost: %.4f",
+                         self.total_profit, self.total_cost)
 
             except Exception as e:
-                print(f"Error during order placement: {e}")
+                log.error("Error during order placement: %s", e)
                 # Not updating prev_price_levels here, so it might retry if the error was transient
         else:
-            if arbitrage_regime:
-                print(f"[INFO] Arbitrage regime ended. Total profit: {total_profit:.4f}, Total cost: {total_cost:.4f}")
-                arbitrage_regime = False
-                arbitrage_times.append(asyncio.get_event_loop().time() - arbitrage_start)
-                arbitrage_start = None
-                print(f"Arbitrage times: {arbitrage_times}")
-        queue.task_done()
+            if self.arbitrage_regime:
+                log.info("Arbitrage regime ended. Total profit: %.4f, Total cost: %.4f",
+                         self.total_profit, self.total_cost)
+                self.arbitrage_regime = False
+                self.arbitrage_times.append(self.loop.time() - self.arbitrage_start)
+                self.arbitrage_start = None
+                log.info("Arbitrage times: %s", self.arbitrage_times)
 
 
-def check_arbitrage(market1_price: Decimal, market2_inverse_price: Decimal, shares: Decimal):
+async def message_consumer(
+    queue: asyncio.Queue,
+    polymarket_client: AsyncMarketDataClient,
+    kalshi_client: KalshiWebSocketClient,
+    real_time_graph: RealTimeGraph
+):
+    """Centralized consumer of all WS messages."""
+    eng = ArbEngine(polymarket_client, kalshi_client, real_time_graph)
+    # Bound methods cached once; dict dispatch replaces the if/elif chain,
+    # and the per-iteration attribute lookups become LOAD_FASTs
+    dispatch = {"polymarket": eng.on_polymarket, "kalshi": eng.on_kalshi}
+    get_batch = queue.get_batch
+    tick = eng.tick
+
+    while True:
+        # Drain the whole burst and arb-check once on the newest offers;
+        # intermediate ticks from the same source are stale by definition
+        for source_name, payload in await get_batch():
+            dispatch[source_name](payload)
+        await tick()
+
+
+def check_arbitrage(market1_price: int, market2_inverse_price: int, shares: int):
+    """Prices in fixed-point units (see SCALE); pnl values are also in units."""
     market2_fee = calculate_kalshi_fees(market2_inverse_price, shares)
-    profit_if_win_market1 = (1 - market1_price) * shares
-    profit_if_win_market2 = (1 - market2_inverse_price) * shares - market2_fee
+    profit_if_win_market1 = (SCALE - market1_price) * shares
+    profit_if_win_market2 = (SCALE - market2_inverse_price) * shares - market2_fee
     cost_market1 = market1_price * shares
     cost_market2 = market2_inverse_price * shares + market2_fee
 
@@ -280,52 +472,45 @@ def check_arbitrage(market1_price: Decimal, market2_inverse_price: Decimal, shar
     }
 
 
-def check_markets_arbitrage(m1_yes, m1_no, m2_yes, m2_no, shares=100.0):
-    m1_yes, m1_no, m2_yes, m2_no, shares = Decimal(m1_yes), Decimal(m1_no), Decimal(m2_yes), Decimal(m2_no), Decimal(shares)
-    pm1 = check_arbitrage(m1_yes, m2_no,  shares)
-    pm2 = check_arbitrage(m1_no, m2_yes,  shares)
-
-    # profit is the same in both outcomes whenever arbitrage exists
-    profit1 = pm1["pnl_if_win"]
-    profit2 = pm2["pnl_if_win"]
-
-    is_arbitrage = profit1 > 0 or profit2 > 0
-    strategy = None
-    market1_action, market2_action, profit_per_share = None, None, None
-    if is_arbitrage:
-        if profit1 > profit2:
-            strategy = f"bet yes on market 1 @ {m1_yes} and no on market 2 @ {m2_no}. Profit Per Share: {profit1}"
-            market1_action = 0
-            market2_action = 1
-            profit_per_share = profit1
-        else:
-            strategy = f"bet no on market 1 @ {m1_no} and yes on market 2 @ {m2_yes}. Profit Per Share: {profit2}"
-            market1_action = 1
-            market2_action = 0
-            profit_per_share = profit2
+def check_markets_arbitrage(m1_yes, m1_no, m2_yes, m2_no, shares=1):
+    """Cross-market check on fixed-point unit prices.
 
-    return {
-        "is_arbitrage": is_arbitrage,
-        "strategy": strategy,
-        "market1_action": market1_action,
-        "market2_action": market2_action,
-        "profit_per_share": profit_per_share,
-        "market1_pnl": profit1,
-        "market2_pnl": profit2,
-    }
+    Returns a flat tuple — (is_arbitrage, market1_action, market2_action,
+    profit_per_share, pm_buy_level, kx_buy_level, profit1, profit2) — all in
+    units, with the levels the winning strategy buys at included so the
+    caller never re-reads them from the offer dicts. Strategy text is built
+    separately by describe_strategy, off the per-tick path.
+    """
+    is_arbitrage, m1_action, m2_action, profit1, profit2 = _check_arb_core(
+        m1_yes, m1_no, m2_yes, m2_no, shares)
+
+    if m1_action == 0:
+        profit_per_share = profit1
+        pm_buy_level, kx_buy_level = m1_yes, m2_no
+    else:
+        profit_per_share = profit2
+        pm_buy_level, kx_buy_level = m1_no, m2_yes
+
+    return (is_arbitrage, m1_action, m2_action, profit_per_share,
+            pm_buy_level, kx_buy_level, profit1, profit2)
+
+
+def describe_strategy(m1_action, pm_buy_level, kx_buy_level, profit_per_share):
+    """Human-readable strategy line; only called when an arb is logged."""
+    sides = "yes on market 1" if m1_action == 0 else "no on market 1"
+    other = "no on market 2" if m1_action == 0 else "yes on market 2"
+    return (f"bet {sides} @ {pm_buy_level / SCALE} and {other} @ "
+            f"{kx_buy_level / SCALE}. Profit Per Share: {profit_per_share / SCALE}")
 
 
 def round_up(value, decimal_places=2):
     multiplier = 10 ** decimal_places
     return math.ceil(value * multiplier) / multiplier
-    
-def calculate_kalshi_fees(contract_price: Decimal, shares: Decimal, fee_rate=0.07) -> Decimal:
-    shares, contract_price, fee_rate = Decimal(shares), Decimal(contract_price), Decimal(fee_rate)
-    fee = (fee_rate * shares * contract_price * (1-contract_price)).quantize(Decimal('0.01'), rounding="ROUND_UP")
-    return fee
 
 async def main():
     load_dotenv()
+    check_websockets_speedups()
+    log_listener = start_log_listener()
     env = Environment.PROD # Or Environment.DEMO
     kalshi_api_key_id = os.getenv("KALSHI_API_ID") 
     kalshi_private_key_path = os.getenv("KALSHI_PRIVATE_KEY_PATH")
@@ -333,7 +518,11 @@ async def main():
     if not all([kalshi_api_key_id, kalshi_private_key_path]):
         print("Kalshi API ID or Private Key Path not found in .env")
         return
-    kalshi_private_key = load_private_key_from_file(kalshi_private_key_path)
+    # PEM parse + RSA decode is a blocking few-ms read; schedule it on a
+    # worker thread now (a bare to_thread coroutine wouldn't start until
+    # awaited) so it overlaps with the rest of startup
+    kalshi_private_key_fut = asyncio.ensure_future(
+        asyncio.to_thread(load_private_key_from_file, kalshi_private_key_path))
 
     POLY_PRIVATE_KEY = os.getenv("POLY_PRIVATE_KEY")
     POLY_PROXY_ADDRESS = os.getenv("POLY_PROXY_ADDRESS") # Funder address for Polymarket
@@ -357,21 +546,23 @@ async def main():
         "http": os.getenv("PROXY"),
         "https": os.getenv("PROXY"),
     }
-    queue = asyncio.Queue()
-    
-    # Initialize clients
+    queue = SingleConsumerQueue()
+    loop = asyncio.get_running_loop()
+
+    # Initialize clients; callbacks are bound once instead of per-message lambdas
     polymarket_client = AsyncMarketDataClient(
-        api_creds=api_creds, 
-        private_key=POLY_PRIVATE_KEY, 
+        api_creds=api_creds,
+        private_key=POLY_PRIVATE_KEY,
         funder=POLY_PROXY_ADDRESS,
         proxies=polymarket_order_proxies,
-        callback=lambda data: queue.put_nowait(("polymarket", data))
+        callback=functools.partial(_enqueue, loop, queue, "polymarket")
     )
+    kalshi_private_key = await kalshi_private_key_fut
     kalshi_client = KalshiWebSocketClient(
-        kalshi_api_key_id, 
-        kalshi_private_key, 
-        env, 
-        callback=lambda data: queue.put_nowait(("kalshi", data))
+        kalshi_api_key_id,
+        kalshi_private_key,
+        env,
+        callback=functools.partial(_enqueue, loop, queue, "kalshi")
     )
 
     # Polymarket condition ID
@@ -386,7 +577,8 @@ async def main():
     root.geometry("800x600")
     real_time_graph = RealTimeGraph(root, market_labels=["PM LA Dodgers", "PM AZ Diamondbacks", "Kalshi LA Dodgers", "Kalshi AZ Diamondbacks"])
     tasks = [
-        asyncio.create_task(run_tk_event_loop(root), name="TkinterLoop"),
+        asyncio.create_task(run_tk_event_loop(root, real_time_graph), name="TkinterLoop"),
+        asyncio.create_task(flush_graph_periodically(real_time_graph), name="GraphFlush"),
         asyncio.create_task(polymarket_client.connect(polymarket_condition_id)),
         asyncio.create_task(kalshi_client.connect(tickers=kalshi_tickers)),
         asyncio.create_task(message_consumer(queue, polymarket_client, kalshi_client, real_time_graph)) 
@@ -403,6 +595,7 @@ async def main():
             task.cancel()
         # Wait for tasks to acknowledge cancellation
         await asyncio.gather(*tasks, return_exceptions=True)
+        log_listener.stop()
         print("All tasks cancelled.")
     
 if __name__ == "__main__":
@@ -411,5 +604,11 @@ if __name__ == "__main__":
         print(".env file loaded.")
     else:
         print(".env file not found. Please ensure your API keys and other configurations are set as environment variables or in a .env file.")
-    
+
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # optional; default asyncio loop works, just slower
+
     asyncio.run(main())
\ No newline at end of file
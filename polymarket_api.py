@@ -3,9 +3,41 @@ from py_clob_client.clob_types import OrderArgs, OrderType, MarketOrderArgs
 from py_clob_client.utilities import generate_orderbook_summary_hash, parse_raw_orderbook_summary, OrderBookSummary, OrderSummary
 from py_clob_client.order_builder.constants import BUY, SELL
 import asyncio
-import json
+import concurrent.futures
+from array import array
+from bisect import bisect_left
+try:
+    import orjson as _json  # ~2-3x faster than stdlib on book snapshot frames
+except ImportError:
+    import json as _json
 import websockets  # Need to use asyncio-compatible websockets library
-from decimal import *
+
+from arb_kernel import SCALE
+
+
+class _Book:
+    """Per-asset book record; slots make the hot-path field reads a fixed
+    offset instead of a dict hash lookup, and cut per-book memory."""
+
+    __slots__ = ("token_id", "outcome", "bid_prices", "bid_sizes",
+                 "ask_prices", "ask_sizes", "timestamp", "spread", "mid")
+
+    def __init__(self, token_id, outcome):
+        self.token_id = token_id
+        self.outcome = outcome
+        self.bid_prices = array('q')
+        self.bid_sizes = []
+        self.ask_prices = array('q')
+        self.ask_sizes = []
+        self.timestamp = None
+        self.spread = None
+        self.mid = None
+
+    def __repr__(self):
+        return (f"_Book({self.outcome!r}, bids={len(self.bid_prices)}, "
+                f"asks={len(self.ask_prices)}, spread={self.spread})")
+
+
 class AsyncMarketDataClient:
     """
     A client for connecting to and processing CLOB (Central Limit Order Book) market data
@@ -36,7 +68,36 @@ class AsyncMarketDataClient:
         self._callback = callback
         self.tick_size = None
         self.decimal_places = 2
+        # Assets touched since the last publish, and the last-built entries;
+        # get_best_bidasks only recomputes the dirty ones
+        self._dirty = set()
+        self._best_bidasks = {}
+        # Fixed-shape callback payload, allocated once; best_offers aliases
+        # the live per-outcome cache so publishing is just a callback call
+        self._result = {"market": "Polymarket", "best_offers": self._best_bidasks}
+        # Prices live internally as integer ticks (price / tick_size); the
+        # scale is refreshed whenever tick_size is learned or changes
+        self.tick_scale = 100
+        self._units_per_tick = SCALE // self.tick_scale
+        # Wire price strings repeat from a tiny domain (<= 1/tick_size + 1
+        # values); memoizing skips the float parse on nearly every level
+        self._tick_cache = {}
         self.proxies = proxies
+        # Pre-framed subscribe message, built on first connect and reused
+        # verbatim on reconnects
+        self._subscribe_payload = None
+        # Order placement gets its own tiny pool so signing/posting never
+        # queues behind whatever else is on the loop's default executor
+        self._rest_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="poly-rest")
+        # Bound handlers resolved once; parse_message does a single dict
+        # lookup per message instead of chained string compares
+        self._handlers = {
+            "book": self.update_orderbook,
+            "price_change": self.update_orderbook_from_price_change,
+            "tick_size_change": self._on_tick_size_change,
+            "last_trade_price": self.update_orderbook_from_last_trade_price,
+        }
 
         print("[polymarket] Polymarket client initialized. Proxies:", self.proxies)
 
@@ -45,25 +106,27 @@ class AsyncMarketDataClient:
     def parse_message(self, messages):
         """
         Parse incoming WebSocket messages and update the orderbook accordingly.
-        
+
         Args:
             messages (list): List of message dictionaries
         """
+        handlers = self._handlers
         for message in messages:
-            if message["event_type"] == "book":
-                self.update_orderbook(message)
-            elif message["event_type"] == "price_change":
-                self.update_orderbook_from_price_change(message)
-            elif message["event_type"] == "tick_size_change":
-                print("[polymarket] tick size changed to", message["new_tick_size"])
-                self.tick_size = message["new_tick_size"]
-                self.decimal_places = len(str(self.tick_size).split(".")[1]) if "." in str(self.tick_size) else 0
-                getcontext().prec = self.decimal_places + 2
-            elif message["event_type"] == "last_trade_price":
-                self.update_orderbook_from_last_trade_price(message)
+            handler = handlers.get(message["event_type"])
+            if handler is not None:
+                handler(message)
             else:
                 print("received unknown message", message)
 
+    def _on_tick_size_change(self, message):
+        print("[polymarket] tick size changed to", message["new_tick_size"])
+        self.tick_size = message["new_tick_size"]
+        self.decimal_places = len(str(self.tick_size).split(".")[1]) if "." in str(self.tick_size) else 0
+        old_scale = self.tick_scale
+        self._set_tick_scale()
+        if self.tick_scale != old_scale:
+            self._rescale_books(old_scale, self.tick_scale)
+
     async def on_connect(self, websocket, condition_id):
         """
         WebSocket connection opened handler. Subscribes to market data.
@@ -72,57 +135,152 @@ class AsyncMarketDataClient:
             websocket: WebSocket connection object
         """
         print("[polymarket] WebSocket connection opened.")
-        asset_ids = self.get_markets(condition_id)
-        # Subscribe to the desired channels
-        subscribe_message = {
-            "type": "market",
-            "assets_ids": [asset[0] for asset in asset_ids],
-        }
-        print("[polymarket] Subscribing to assets:", asset_ids)
-        await websocket.send(json.dumps(subscribe_message))
+        if self._subscribe_payload is None:
+            asset_ids = await self.get_markets(condition_id)
+            # Frame the subscribe message once; reconnects just resend it.
+            # orjson.dumps returns bytes, stdlib returns str; websockets
+            # accepts both
+            print("[polymarket] Subscribing to assets:", asset_ids)
+            self._subscribe_payload = _json.dumps({
+                "type": "market",
+                "assets_ids": [asset[0] for asset in asset_ids],
+            })
+        await websocket.send(self._subscribe_payload)
 
-    def get_markets(self, condition_id):
+    async def get_markets(self, condition_id):
         """
         Get market data for a given condition ID and initialize orderbook.
-        
+
+        The ClobClient calls are synchronous REST round-trips, so they run on
+        the default executor — the per-token book fetches concurrently.
+
         Args:
             condition_id (str): The market condition ID
-            
+
         Returns:
             list: List of asset IDs in the market
         """
         print("[polymarket] Getting Polymarket markets for Condition ID:", condition_id)
-        market = self.client.get_market(condition_id)
+        loop = asyncio.get_running_loop()
+        market = await loop.run_in_executor(None, self.client.get_market, condition_id)
         print("[polymarket] market retrieved:", market)
         self.tick_size = market["minimum_tick_size"]
         self.decimal_places = len(str(self.tick_size).split(".")[1]) if "." in str(self.tick_size) else 0
-        getcontext().prec = self.decimal_places + 2
+        self._set_tick_scale()
         print("[polymarket] tick size:", self.tick_size)
         print("[polymarket] decimal places:", self.decimal_places)
         
         asset_ids = []
-        for token in market["tokens"]:
+        tokens = market["tokens"]
+        raw_books = await asyncio.gather(*[
+            loop.run_in_executor(None, self.client.get_order_book, token["token_id"])
+            for token in tokens
+        ])
+        for token, raw_book in zip(tokens, raw_books):
             token_id, outcome = token["token_id"], token["outcome"]
             asset_ids.append((token["token_id"], outcome))
-            self.orderbook[token_id] = self.client.get_order_book(token_id).__dict__
-            self.orderbook[token_id]["outcome"] = outcome
+            book = _Book(token_id, outcome)
+            # REST levels are OrderSummary objects; build the same SoA sides
+            # the WS snapshot path produces
+            book.bid_prices, book.bid_sizes = self._build_side(
+                [{"price": lvl.price, "size": lvl.size} for lvl in raw_book.bids])
+            book.ask_prices, book.ask_sizes = self._build_side(
+                [{"price": lvl.price, "size": lvl.size} for lvl in raw_book.asks])
+            book.timestamp = getattr(raw_book, "timestamp", None)
+            self._refresh_spread_mid(book)
+            self.orderbook[token_id] = book
 
         # print("Parsed Orderbook:", self.orderbook)
         return asset_ids
 
+    def _set_tick_scale(self):
+        """Refresh the integer tick scale from the current tick_size."""
+        self.tick_scale = int(round(1 / float(self.tick_size)))
+        self._units_per_tick = SCALE // self.tick_scale
+        # cached conversions are only valid for one tick scale
+        self._tick_cache.clear()
+
+    def _rescale_books(self, old_scale, new_scale):
+        """Re-express every live book's ticks at the new tick scale.
+
+        Level changes after a tick_size_change arrive on the new grid;
+        without this they would bisect against ticks from the old grid and
+        the publish path would rescale stale ticks with the new
+        units-per-tick, emitting prices off by the scale ratio. Books are
+        re-marked dirty so the next publish refreshes their entries.
+        """
+        for asset_id, book in self.orderbook.items():
+            book.bid_prices, book.bid_sizes = self._rescale_side(
+                book.bid_prices, book.bid_sizes, old_scale, new_scale)
+            book.ask_prices, book.ask_sizes = self._rescale_side(
+                book.ask_prices, book.ask_sizes, old_scale, new_scale)
+            self._refresh_spread_mid(book)
+            self._dirty.add(asset_id)
+
+    @staticmethod
+    def _rescale_side(prices, sizes, old_scale, new_scale):
+        """One side re-gridded: exact when refining; coarsening merges the
+        sizes of levels that collide on the wider grid (order preserved
+        because the mapping is monotone)."""
+        new_prices = array('q')
+        new_sizes = []
+        for ticks, size in zip(prices, sizes):
+            scaled = ticks * new_scale // old_scale
+            if new_prices and new_prices[-1] == scaled:
+                new_sizes[-1] += size
+            else:
+                new_prices.append(scaled)
+                new_sizes.append(size)
+        return new_prices, new_sizes
+
+    def _to_ticks(self, price):
+        """Convert a wire price string to integer ticks (memoized)."""
+        ticks = self._tick_cache.get(price)
+        if ticks is None:
+            ticks = self._tick_cache[price] = int(round(float(price) * self.tick_scale))
+        return ticks
+
+    def _build_side(self, levels):
+        """SoA side from wire levels: ascending int-tick array + size list.
+
+        A contiguous array('q') keeps the C bisect on a flat int buffer
+        instead of chasing a dict pointer per comparison.
+        """
+        to_ticks = self._to_ticks
+        pairs = sorted((to_ticks(lvl["price"]), float(lvl["size"])) for lvl in levels)
+        return array('q', (p for p, _ in pairs)), [s for _, s in pairs]
+
+    def _refresh_spread_mid(self, book):
+        """Spread/mid in integer ticks off the top-of-book levels.
+
+        A one-sided book (every level on a side cancelled) has no spread;
+        leave None rather than raising on the empty array.
+        """
+        ask_prices = book.ask_prices
+        bid_prices = book.bid_prices
+        if not ask_prices or not bid_prices:
+            book.spread = None
+            book.mid = None
+            return
+        ask_ticks = ask_prices[0]
+        bid_ticks = bid_prices[-1]
+        book.spread = ask_ticks - bid_ticks
+        book.mid = (ask_ticks + bid_ticks) / 2
+
     def update_orderbook(self, message):
         """
         Update orderbook with full book information.
-        
+
         Args:
             message (dict): Message containing book data
         """
         asset_id = message["asset_id"]
-        self.orderbook[asset_id]["bids"] = message["bids"]
-        self.orderbook[asset_id]["asks"] = message["asks"]
-        self.orderbook[asset_id]["timestamp"] = message["timestamp"]
-        self.orderbook[asset_id]["spread"] = Decimal(message["asks"][-1]["price"]) - Decimal(message["bids"][-1]["price"])
-        self.orderbook[asset_id]["mid"] = (Decimal(message["asks"][-1]["price"]) + Decimal(message["bids"][-1]["price"])) / Decimal("2")
+        book = self.orderbook[asset_id]
+        book.bid_prices, book.bid_sizes = self._build_side(message["bids"])
+        book.ask_prices, book.ask_sizes = self._build_side(message["asks"])
+        book.timestamp = message["timestamp"]
+        self._refresh_spread_mid(book)
+        self._dirty.add(asset_id)
 
     def update_orderbook_from_price_change(self, message):
         """
@@ -132,13 +290,18 @@ class AsyncMarketDataClient:
             message (dict): Message containing price changes
         """
         asset_id, changes = message["asset_id"], message["changes"]
+        top_moved = False
         for change in changes:
             price, side, size = change["price"], change["side"], change["size"]
-            self.update_orderbook_level(asset_id, price, side, size)
+            if self.update_orderbook_level(asset_id, price, side, size):
+                top_moved = True
 
-        self.orderbook[asset_id]["timestamp"] = message["timestamp"]
-        self.orderbook[asset_id]["spread"] = Decimal(self.orderbook[asset_id]["asks"][-1]["price"]) - Decimal(self.orderbook[asset_id]["bids"][-1]["price"])
-        self.orderbook[asset_id]["mid"] = (Decimal(self.orderbook[asset_id]["asks"][-1]["price"]) + Decimal(self.orderbook[asset_id]["bids"][-1]["price"])) / Decimal("2")
+        book = self.orderbook[asset_id]
+        book.timestamp = message["timestamp"]
+        # spread/mid only depend on the top levels; skip when depth changed
+        if top_moved:
+            self._refresh_spread_mid(book)
+        self._dirty.add(asset_id)
 
 
 
@@ -151,32 +314,74 @@ class AsyncMarketDataClient:
             message (dict): Message containing price changes
         """
         asset_id, price, side, size, timestamp = message["asset_id"], message["price"], message["side"], message["size"], message["timestamp"]
-        self.update_orderbook_level(asset_id, price,  side, size)
-        self.orderbook[asset_id]["timestamp"] = timestamp
-        self.orderbook[asset_id]["spread"] = Decimal(self.orderbook[asset_id]["asks"][-1]["price"]) - Decimal(self.orderbook[asset_id]["bids"][-1]["price"])
-        self.orderbook[asset_id]["mid"] = (Decimal(self.orderbook[asset_id]["asks"][-1]["price"]) + Decimal(self.orderbook[asset_id]["bids"][-1]["price"])) / Decimal("2")
+        top_moved = self.update_orderbook_level(asset_id, price,  side, size)
+        book = self.orderbook[asset_id]
+        book.timestamp = timestamp
+        if top_moved:
+            self._refresh_spread_mid(book)
+        self._dirty.add(asset_id)
     def get_best_bidasks(self):
         """
         Get the best bid and ask for each asset in the orderbook.
         
+        Only assets touched since the last call are recomputed; untouched
+        entries are served from the previous build. The per-outcome dicts
+        are allocated once and mutated in place afterwards.
+
         Returns:
-            dict: Dictionary mapping outcomes to their best bid/ask data including token_id
+            dict: Outcomes to their best bid/ask data, or None when nothing
+                  changed since the last call (lets the caller skip publishing)
         """
-        best_bidasks = {}
-        for asset_id, book in self.orderbook.items(): 
-            if book.get("bids") and book.get("asks") and book["bids"] and book["asks"]:
-                best_bid = book["bids"][-1]
-                best_ask = book["asks"][-1]
-                best_bidasks[book["outcome"]] = {
-                    "token_id": asset_id,  
-                    "best_bid": (best_bid['price'], best_bid["size"]),
-                    "best_ask": (best_ask['price'], best_ask["size"]),
-                    "spread": str(Decimal(best_ask["price"]) - Decimal(best_bid["price"])),
-                    "timestamp": book["timestamp"],
-                }
+        if not self._dirty:
+            return None
+        best_bidasks = self._best_bidasks
+        units_per_tick = self._units_per_tick
+        for asset_id in self._dirty:
+            book = self.orderbook[asset_id]
+            bid_prices = book.bid_prices
+            ask_prices = book.ask_prices
+            if bid_prices and ask_prices:
+                # Publish fixed-point prices (see arb_kernel.SCALE) so the
+                # consumer indexes ready-made ints; ticks rescale with one
+                # multiply, no string parsing. Sides are ascending, so best
+                # bid is the last entry and best ask the first.
+                bid_units = bid_prices[-1] * units_per_tick
+                ask_units = ask_prices[0] * units_per_tick
+                entry = best_bidasks.get(book.outcome)
+                if entry is None:
+                    best_bidasks[book.outcome] = {
+                        "token_id": asset_id,
+                        "best_bid": (bid_units, book.bid_sizes[-1]),
+                        "best_ask": (ask_units, book.ask_sizes[0]),
+                        "spread": ask_units - bid_units,
+                        "timestamp": book.timestamp,
+                    }
+                else:
+                    # Fresh tuples keep value semantics for consumers that
+                    # hold the old top; only the dict itself is reused
+                    entry["best_bid"] = (bid_units, book.bid_sizes[-1])
+                    entry["best_ask"] = (ask_units, book.ask_sizes[0])
+                    entry["spread"] = ask_units - bid_units
+                    entry["timestamp"] = book.timestamp
+            else:
+                # A side was fully cancelled; withdraw the outcome so the
+                # consumer's missing-data check skips the tick instead of
+                # acting on a stale top that no longer exists
+                best_bidasks.pop(book.outcome, None)
+        self._dirty.clear()
         return best_bidasks
     
-    async def place_order(self, token_id: str, price: float, size: float, side: str, use_proxy: bool = False): 
+    @staticmethod
+    def _frames_buffered(websocket) -> bool:
+        """True if frames are already queued ahead of the next recv.
+
+        The asyncio implementation buffers incoming frames on the
+        connection's recv_messages assembler.
+        """
+        assembler = getattr(websocket, "recv_messages", None)
+        return assembler is not None and bool(assembler.frames)
+
+    async def place_order(self, token_id: str, price: float, size: float, side: str, use_proxy: bool = False):
         print(f"[polymarket] placing order: {side} {size} of {token_id} @ {price}")
         order_args = OrderArgs(
             token_id=token_id,
@@ -187,16 +392,18 @@ class AsyncMarketDataClient:
 
         loop = asyncio.get_running_loop()
         try:
-            # self.client methods are synchronous, run them in an executor
-            signed_order = await loop.run_in_executor(None, self.client.create_order, order_args)
+            # self.client methods are synchronous; run them on the dedicated
+            # order executor so they never wait behind default-pool work
+            executor = self._rest_executor
+            signed_order = await loop.run_in_executor(executor, self.client.create_order, order_args)
             print(f"[polymarket] Signed order: {signed_order.dict()}")
             if use_proxy:
                 print(f"[polymarket] Using proxy for order placement")
                 # Use the proxy for order placement
-                response = await loop.run_in_executor(None, self.client.post_order, signed_order, OrderType.FOK, self.proxies)
+                response = await loop.run_in_executor(executor, self.client.post_order, signed_order, OrderType.FOK, self.proxies)
             else:
                 # Use the default method for order placement
-                response = await loop.run_in_executor(None, self.client.post_order, signed_order, OrderType.FOK)
+                response = await loop.run_in_executor(executor, self.client.post_order, signed_order, OrderType.FOK)
             print(f"[polymarket] Order placement response: {response}")
 
             if isinstance(response, dict) and response.get("status") == "error": # py_clob_client might return dict on error
@@ -217,37 +424,53 @@ class AsyncMarketDataClient:
 
             
         uri = self.WSS + "market"
-        async with websockets.connect(uri) as websocket:
-            self.websocket = websocket
-            self._running = True
-            
-            # Subscribe to channels upon connection
-            await self.on_connect(websocket, condition_id)
-            
-            # Message processing loop
+        self._running = True
+        backoff = 1
+        while self._running:
             try:
-                while self._running:
-                    message = await websocket.recv()
-                    message_data = json.loads(message)
-                    self.parse_message(message_data)
-                    best_bids = self.get_best_bidasks()
-                    result =  {
-                        "market": "Polymarket",
-                        "best_offers": best_bids,
-                    }
+                # No permessage-deflate: CPU per frame beats bandwidth for this
+                # feed. max_size raised so full book snapshots never trip the
+                # 1 MiB default; max_queue sized for bursts so the reader
+                # isn't flow-controlled early.
+                async with websockets.connect(uri, compression=None, max_size=2**22,
+                                              max_queue=256,
+                                              ping_interval=20, ping_timeout=20) as websocket:
+                    self.websocket = websocket
+                    backoff = 1
+
+                    # Subscribe to channels upon connection
+                    await self.on_connect(websocket, condition_id)
+
+                    # Message processing loop
+                    while self._running:
+                        # decode=False skips the text-frame UTF-8 decode; both
+                        # orjson and stdlib json accept bytes directly
+                        message = await websocket.recv(decode=False)
+                        message_data = _json.loads(message)
+                        self.parse_message(message_data)
+                        # Coalesce bursts: while complete frames sit in the recv
+                        # buffer, keep applying them and publish once at the end
+                        if self._frames_buffered(websocket):
+                            continue
+                        # None means nothing changed since the last publish
+                        # (e.g. a last_trade_price at an existing level)
+                        if self.get_best_bidasks() is None:
+                            continue
+
+                        if self._callback:
+                            self._callback(self._result)
 
-                    if self._callback:
-                        self._callback(result)
-                    
-                
             except websockets.exceptions.ConnectionClosed:
                 print("[polymarket] WebSocket connection closed.")
-                print("[polymarket] orderbook:", self.orderbook)
             except Exception as e:
                 print(f"[polymarket] Error in Polymarket WebSocket handler: {e}")
             finally:
-                self._running = False
                 self.websocket = None
+            if self._running:
+                print(f"[polymarket] Reconnecting in {backoff}s...")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+        self._running = False
     
     async def connect(self, condition_id=None):
         """
@@ -282,46 +505,30 @@ class AsyncMarketDataClient:
         """
         return self._running and self.websocket is not None
 
-    def find_index(self, price, asset_id, side):
-        arr = self.orderbook[asset_id][side]
-        price = Decimal(price)
-        l,r = 0, len(arr)-1
-
-        descending = False
-        if side == 'asks':
-            descending = True
-        while l <= r:
-            mid = (l + r) // 2
-            mid_price = Decimal(arr[mid]["price"])
-
-            if mid_price == price:
-                return mid
-
-            if descending:
-                if mid_price < price:
-                    r = mid - 1
-                else:
-                    l = mid + 1
-            else:
-                if mid_price < price:
-                    l = mid + 1
-                else:
-                    r = mid - 1
-        return l
-    
     def update_orderbook_level(self, asset_id, price, side, size):
-        side = "bids" if side == "BUY" else "asks"
-        index = self.find_index(price, asset_id, side)
-        if index == len(self.orderbook[asset_id][side]):
-            self.orderbook[asset_id][side].append({"price": price, "size": size})
-            return
-        if self.orderbook[asset_id][side][index]["price"] != price:
-            self.orderbook[asset_id][side].insert(index, {"price": price, "size": size})
+        """Apply one level change; returns True if the side's top price moved."""
+        book = self.orderbook[asset_id]
+        if side == "BUY":
+            prices, sizes = book.bid_prices, book.bid_sizes
+            top = -1  # best bid is the highest price
         else:
-            if size == '0':
-                self.orderbook[asset_id][side].pop(index)
+            prices, sizes = book.ask_prices, book.ask_sizes
+            top = 0  # best ask is the lowest price
+        old_top = prices[top] if prices else None
+        price_ticks = self._to_ticks(price)
+        size = float(size)
+        i = bisect_left(prices, price_ticks)
+        if i < len(prices) and prices[i] == price_ticks:
+            if size == 0.0:
+                del prices[i]
+                del sizes[i]
             else:
-                self.orderbook[asset_id][side][index]["size"] = size
+                sizes[i] = size
+        elif size != 0.0:
+            prices.insert(i, price_ticks)
+            sizes.insert(i, size)
+        new_top = prices[top] if prices else None
+        return new_top != old_top
 async def main():
     # Create client instance
     client = AsyncMarketDataClient()
@@ -342,4 +549,9 @@ async def main():
         print("[polymarket] Client disconnected.")
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # optional; default asyncio loop works, just slower
     asyncio.run(main())
\ No newline at end of file